@@ -43,6 +43,10 @@ S3_CONFORMED_BUCKET = 's3_conformed_bucket'
 S3_PURPOSE_BUILT_BUCKET = 's3_purpose_built_bucket'
 CROSS_ACCOUNT_DYNAMODB_ROLE = 'cross_account_dynamodb_role'
 
+# Used in SSM Parameter lookups
+S3_RAW_BUCKET_PARAMETER = 's3_raw_bucket_parameter'
+S3_CONFORMED_BUCKET_PARAMETER = 's3_conformed_bucket_parameter'
+
 GLUE_CONNECTION_AVAILABILITY_ZONE = 'glue_connection_availability_zone'
 GLUE_CONNECTION_SUBNET = 'glue_connection_subnet'
 
@@ -127,8 +131,12 @@ def get_environment_configuration(environment: str) -> dict:
         S3_PURPOSE_BUILT_BUCKET: f'{environment}PurposeBuiltBucketName',
         CROSS_ACCOUNT_DYNAMODB_ROLE: f'{environment}CrossAccountDynamoDbRoleArn'
     }
+    ssm_parameter_mapping = {
+        S3_RAW_BUCKET_PARAMETER: f'/DataLake/{environment}/RawBucketName',
+        S3_CONFORMED_BUCKET_PARAMETER: f'/DataLake/{environment}/ConformedBucketName',
+    }
 
-    return {**cloudformation_output_mapping, **get_local_configuration(environment)}
+    return {**cloudformation_output_mapping, **ssm_parameter_mapping, **get_local_configuration(environment)}
 
 
 def get_all_configurations() -> dict:
@@ -2,8 +2,9 @@
 # SPDX-License-Identifier: MIT-0
 
 import json
-import boto3
-import botocore
+import botocore.config
+import botocore.exceptions
+import botocore.session
 import os
 import logging
 import os.path
@@ -26,10 +27,17 @@ def load_log_config():
 # Logger initiation
 logger = load_log_config()
 
+# Created once per execution environment. Only the low-level client is used, so boto3 is not imported.
+# Throttled writes are retried by botocore with adaptive backoff.
+dynamodb_client = botocore.session.get_session().create_client(
+    'dynamodb',
+    config=botocore.config.Config(retries={'mode': 'adaptive', 'max_attempts': 5}),
+)
+
 
 def lambda_handler(event, context):
     """
-    Lambda function's entry point. This function receives a success event
+    Lambda function's entry point. This function receives a success or failure event
     from Step Functions State machine, transforms error message, and update
     DynamoDB table.
 
@@ -56,16 +64,15 @@ def lambda_handler(event, context):
         p_stp_fn_time = now.strftime("%Y%m%d%H%M%S%f")
         # update table
         try:
-            dynamo_client = boto3.resource('dynamodb')
-            table = dynamo_client.Table(os.environ['DYNAMODB_TABLE_NAME'])
-            table.update_item(
+            dynamodb_client.update_item(
+                TableName=os.environ['DYNAMODB_TABLE_NAME'],
                 Key={
-                    'execution_id': execution_id
+                    'execution_id': {'S': execution_id}
                 },
                 UpdateExpression="set joblast_updated_timestamp=:lut,job_latest_status=:sts",
                 ExpressionAttributeValues={
-                    ':sts': status,
-                    ':lut': p_stp_fn_time,
+                    ':sts': {'S': status},
+                    ':lut': {'S': p_stp_fn_time},
                 },
                 ReturnValues="UPDATED_NEW"
             )
@@ -85,17 +92,16 @@ def lambda_handler(event, context):
         # update table
 
         try:
-            dynamo_client = boto3.resource('dynamodb')
-            table = dynamo_client.Table(os.environ['DYNAMODB_TABLE_NAME'])
-            table.update_item(
+            dynamodb_client.update_item(
+                TableName=os.environ['DYNAMODB_TABLE_NAME'],
                 Key={
-                    'execution_id': execution_id
+                    'execution_id': {'S': execution_id}
                 },
                 UpdateExpression="set joblast_updated_timestamp=:lut,job_latest_status=:sts,error_message=:emsg",
                 ExpressionAttributeValues={
-                    ':sts': status,
-                    ':lut': p_stp_fn_time,
-                    ':emsg': error_msg
+                    ':sts': {'S': status},
+                    ':lut': {'S': p_stp_fn_time},
+                    ':emsg': {'S': error_msg}
                 },
                 ReturnValues="UPDATED_NEW"
             )
@@ -106,7 +112,10 @@ def lambda_handler(event, context):
             logger.info("[ERROR] Dynamodb process failed:{}".format(e))
             raise e
 
+    # The state machine publishes one notification for both outcomes, then branches on the job status
     return {
         'statusCode': 200,
-        'body': json.dumps('Dynamodb status updated!')
+        'body': json.dumps('Dynamodb status updated!'),
+        'job_status': status,
+        'notify_subject': 'Job Completed' if status == 'SUCCEEDED' else 'Job Failed',
     }
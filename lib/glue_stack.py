@@ -8,10 +8,12 @@ import aws_cdk.aws_glue as glue
 import aws_cdk.aws_iam as iam
 import aws_cdk.aws_kms as kms
 import aws_cdk.aws_s3_deployment as s3_deployment
+import aws_cdk.aws_ssm as ssm
 
 from .configuration import (
     AVAILABILITY_ZONE_1, SUBNET_ID_1,
-    S3_ACCESS_LOG_BUCKET, S3_KMS_KEY, S3_CONFORMED_BUCKET, S3_PURPOSE_BUILT_BUCKET, SHARED_SECURITY_GROUP_ID,
+    S3_ACCESS_LOG_BUCKET, S3_KMS_KEY, S3_PURPOSE_BUILT_BUCKET, SHARED_SECURITY_GROUP_ID,
+    S3_CONFORMED_BUCKET_PARAMETER, S3_RAW_BUCKET_PARAMETER,
     get_environment_configuration, get_logical_id_prefix, get_resource_name_prefix
 )
 
@@ -53,7 +55,15 @@ class GlueStack(cdk.Stack):
         glue_connection_subnet = cdk.Fn.import_value(self.mappings[SUBNET_ID_1])
         glue_connection_availability_zone = cdk.Fn.import_value(self.mappings[AVAILABILITY_ZONE_1])
 
-        conformed_bucket_name = cdk.Fn.import_value(self.mappings[S3_CONFORMED_BUCKET])
+        # Same SSM parameters as the Step Functions stack, so both stacks agree on the bucket names
+        raw_bucket_name = ssm.StringParameter.value_for_string_parameter(
+            self,
+            self.mappings[S3_RAW_BUCKET_PARAMETER],
+        )
+        conformed_bucket_name = ssm.StringParameter.value_for_string_parameter(
+            self,
+            self.mappings[S3_CONFORMED_BUCKET_PARAMETER],
+        )
         conformed_bucket = s3.Bucket.from_bucket_name(
             self,
             id='ImportedConformedBucket',
@@ -121,7 +131,9 @@ class GlueStack(cdk.Stack):
             default_arguments={
                 '--enable-glue-datacatalog': '""',
                 '--target_database_name': 'datablog_arg',
-                '--target_bucket': conformed_bucket.bucket_name,
+                # Arguments that do not vary per run are set here rather than passed by the state machine
+                '--source_bucketname': raw_bucket_name,
+                '--target_bucketname': conformed_bucket.bucket_name,
                 '--target_table_name': 'datablog_nyc_raw',
                 '--TempDir': f's3://{glue_scripts_temp_bucket.bucket_name}/etl/raw-to-conformed',
             },
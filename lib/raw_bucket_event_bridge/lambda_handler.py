@@ -0,0 +1,54 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import botocore.exceptions
+import botocore.session
+import logging
+import os
+
+
+# Function for logger
+def load_log_config():
+    # Basic config. Replace with your own logging config if required
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    return root
+
+
+# Logger initiation
+logger = load_log_config()
+
+# Created once per execution environment and reused across invocations
+s3_client = botocore.session.get_session().create_client('s3')
+
+
+def lambda_handler(event, context):
+    """
+    Lambda function's entry point. This function receives the ETL stack's status change event
+    from CloudFormation and turns on EventBridge notifications for the raw bucket.
+    PutBucketNotificationConfiguration replaces the whole configuration, so the existing
+    configuration is read first and written back with EventBridge added.
+
+    @param event:
+    @param context:
+    @return:
+    """
+    print(event)
+    bucket_name = os.environ['RAW_BUCKET_NAME']
+    try:
+        configuration = s3_client.get_bucket_notification_configuration(Bucket=bucket_name)
+        configuration.pop('ResponseMetadata', None)
+        if 'EventBridgeConfiguration' in configuration:
+            logger.info('[INFO] EventBridge notifications already enabled on ' + bucket_name)
+            return
+
+        configuration['EventBridgeConfiguration'] = {}
+        s3_client.put_bucket_notification_configuration(
+            Bucket=bucket_name,
+            NotificationConfiguration=configuration,
+        )
+    except botocore.exceptions.ClientError as error:
+        logger.info('[ERROR] Bucket notification update failed:{}'.format(error))
+        raise error
+    logger.info('[INFO] EventBridge notifications enabled on ' + bucket_name)
@@ -2,8 +2,9 @@
 # SPDX-License-Identifier: MIT-0
 
 import json
-import boto3
-import botocore
+import botocore.config
+import botocore.exceptions
+import botocore.session
 import os
 import logging
 import os.path
@@ -12,36 +13,48 @@ import dateutil.tz
 import uuid
 
 
-def start_etl_job_run(execution_id, p_stp_fn_time, sfn_arn, sfn_name, table_name, sfn_input):
+def etl_job_run_item(execution_id, p_stp_fn_time, sfn_arn, sfn_name, sfn_input):
     """
-    Function to insert entry in dynamodb table for audit trail
+    Function to build the dynamodb table entry for the audit trail
     @param execution_id:
     @param p_stp_fn_time:
     @param sfn_arn:
     @param sfn_name:
-    @param table_name:
     @param sfn_input:
+    @return: dict: The item in DynamoDB attribute value format
+    """
+    return {
+        'execution_id': {'S': execution_id},
+        'sfn_execution_name': {'S': sfn_name},
+        'sfn_arn': {'S': sfn_arn},
+        'sfn_input': {'S': sfn_input},
+        'job_latest_status': {'S': 'STARTED'},
+        'job_start_date': {'S': p_stp_fn_time},
+        'joblast_updated_timestamp': {'S': p_stp_fn_time},
+    }
+
+
+def start_etl_job_run(table_name, item):
+    """
+    Function to insert entry in dynamodb table for audit trail.
+    The write is conditional so a redelivered event does not reset an existing entry.
+    @param table_name:
+    @param item:
     """
     try:
         print('start_etl_job_run')
         logger.info('[INFO] start_etl_job_run() called')
-        item = {}
-        item['execution_id'] = execution_id
-        item['sfn_execution_name'] = sfn_name
-        item['sfn_arn'] = sfn_arn
-        item['sfn_input'] = sfn_input
-        item['job_latest_status'] = 'STARTED'
-        item['job_start_date'] = p_stp_fn_time
-        item['joblast_updated_timestamp'] = p_stp_fn_time
-        dynamo_client = boto3.resource('dynamodb')
-        table = dynamo_client.Table(table_name)
-        table.put_item(Item=item)
+        dynamodb_client.put_item(
+            TableName=table_name,
+            Item=item,
+            ConditionExpression='attribute_not_exists(execution_id)',
+        )
     except botocore.exceptions.ClientError as error:
+        if error.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            logger.info('[INFO] Audit entry already exists for {}'.format(item['execution_id']['S']))
+            return
         logger.info('[ERROR] Dynamodb process failed:{}'.format(error))
         raise error
-    except Exception as e:
-        logger.info('[ERROR] Dynamodb process failed:{}'.format(e))
-        raise e
     logger.info('[INFO] start_etl_job_run() execution completed')
     print('insert table completed')
 
@@ -58,12 +71,27 @@ def load_log_config():
 # Logger initiation
 logger = load_log_config()
 
+# Clients are created once per execution environment and reused across invocations.
+# Plain botocore clients avoid loading boto3 on cold start, and botocore retries throttled calls.
+client_config = botocore.config.Config(retries={'mode': 'adaptive', 'max_attempts': 3})
+botocore_session = botocore.session.get_session()
+dynamodb_client = botocore_session.create_client('dynamodb', config=client_config)
+sfn_client = botocore_session.create_client('stepfunctions', config=client_config)
 
-def lambda_handler(event, context):
-    print(event)
-    lambda_message = event['Records'][0]
-    source_bucket_name = lambda_message['s3']['bucket']['name']
-    key = lambda_message['s3']['object']['key']
+
+def start_state_machine(event_id, source_bucket_name, key):
+    """
+    Function to start the ETL state machine for a single object in the raw bucket.
+    The execution id is derived from the event id, so a redelivered event maps to the same
+    audit entry and execution name instead of starting the load again.
+    @param event_id:
+    @param source_bucket_name:
+    @param key:
+    """
+    # Objects must live under s3://<buckename>/<source_system_name>/<table_name>
+    if len(key.split('/')) < 2 or os.path.basename(key) == '':
+        logger.info('[WARN] Skipping object outside of <source_system_name>/<table_name>: ' + key)
+        return
 
     p_full_path = key
     # first object/directory name after buckname will be used as source system name example:
@@ -89,58 +117,84 @@ def lambda_handler(event, context):
     logger.info('state machine arn: ' + sfn_arn)
     logger.info('target bucket name: ' + target_bucket_name)
 
-    if p_base_file_name != '':
-        # Capturing the current time in CST
-        central = dateutil.tz.gettz('US/Central')
-        now = datetime.now(tz=central)
-        p_ingest_time = now.strftime('%m/%d/%Y %H:%M:%S')
-        logger.info(p_ingest_time)
-        # Time stamp for the stepfunction name
-        p_stp_fn_time = now.strftime('%Y%m%d%H%M%S%f')
-
-        p_year = now.strftime('%Y')
-        p_month = now.strftime('%m')
-        p_day = now.strftime('%d')
-
-        logger.info('year: ' + p_year)
-        logger.info('p_month: ' + p_month)
-        logger.info('p_day: ' + p_day)
-        logger.info('sfn name: ' + p_base_file_name + '-' + p_stp_fn_time)
-        sfn_name = p_base_file_name + '-' + p_stp_fn_time
-        print('before step function')
-        execution_id = str(uuid.uuid4())
-        sfn_input = json.dumps(
-            {
-                'JOB_NAME': raw_to_conformed_etl_job_name,
-                'target_databasename': p_source_system_name,
-                'target_bucketname': target_bucket_name,
-                'source_bucketname': source_bucket_name,
-                'source_key': p_file_dir_upd, 
-                'base_file_name': p_base_file_name,
-                'p_year': p_year,
-                'p_month': p_month,
-                'p_day': p_day,
-                'table_name': p_table_name,
-                'execution_id': execution_id,
-            }
+    # Capturing the current time in CST
+    central = dateutil.tz.gettz('US/Central')
+    now = datetime.now(tz=central)
+    p_ingest_time = now.strftime('%m/%d/%Y %H:%M:%S')
+    logger.info(p_ingest_time)
+    # Time stamp for the audit entry
+    p_stp_fn_time = now.strftime('%Y%m%d%H%M%S%f')
+
+    p_year = now.strftime('%Y')
+    p_month = now.strftime('%m')
+    p_day = now.strftime('%d')
+
+    logger.info('year: ' + p_year)
+    logger.info('p_month: ' + p_month)
+    logger.info('p_day: ' + p_day)
+    execution_id = str(uuid.uuid5(uuid.NAMESPACE_URL, event_id))
+    sfn_name = execution_id
+    logger.info('sfn name: ' + sfn_name)
+    sfn_input = json.dumps(
+        {
+            'JOB_NAME': raw_to_conformed_etl_job_name,
+            'target_databasename': p_source_system_name,
+            'target_bucketname': target_bucket_name,
+            'source_bucketname': source_bucket_name,
+            'source_key': p_file_dir_upd,
+            'base_file_name': p_base_file_name,
+            'p_year': p_year,
+            'p_month': p_month,
+            'p_day': p_day,
+            'table_name': p_table_name,
+            'execution_id': execution_id,
+        }
+    )
+    logger.info(sfn_input)
+
+    # Record the audit entry first so every execution the state machine runs has one to update
+    start_etl_job_run(
+        os.environ['DYNAMODB_TABLE_NAME'],
+        etl_job_run_item(execution_id, p_stp_fn_time, sfn_arn, sfn_name, sfn_input),
+    )
+    print('before step function')
+    try:
+        sfn_response = sfn_client.start_execution(
+            stateMachineArn=sfn_arn,
+            name=sfn_name,
+            input=sfn_input
         )
-        logger.info(sfn_input)
+        print(sfn_response)
+    except botocore.exceptions.ClientError as error:
+        if error.response['Error']['Code'] == 'ExecutionAlreadyExists':
+            logger.info('[INFO] Execution already started for {}'.format(sfn_name))
+            return
+        logger.info('[ERROR] Step function client process failed:{}'.format(error))
+        raise error
+
+
+def lambda_handler(event, context):
+    print(event)
+    failed_message_ids = []
+    for sqs_record in event['Records']:
+        # Each record is handled on its own so one bad object does not block the rest of the batch
         try:
-            sfn_client = boto3.client('stepfunctions')
-            sfn_response = sfn_client.start_execution(
-                stateMachineArn=sfn_arn,
-                name=sfn_name,
-                input=sfn_input
+            # Each message body is an EventBridge 'Object Created' event from the raw bucket
+            s3_event = json.loads(sqs_record['body'])
+            if s3_event.get('detail-type') != 'Object Created':
+                continue
+            start_state_machine(
+                s3_event['id'],
+                s3_event['detail']['bucket']['name'],
+                s3_event['detail']['object']['key'],
             )
-            print(sfn_response)
-        except botocore.exceptions.ClientError as error:
-            logger.info('[ERROR] Step function client process failed:{}'.format(error))
-            raise error
         except Exception as e:
-            logger.info('[ERROR] Step function call failed:{}'.format(e))
-            raise e
+            logger.info('[ERROR] Message {} failed:{}'.format(sqs_record['messageId'], e))
+            failed_message_ids.append(sqs_record['messageId'])
 
-        start_etl_job_run(execution_id, p_stp_fn_time, sfn_arn, sfn_name, os.environ['DYNAMODB_TABLE_NAME'], sfn_input)
+    # Processing is idempotent, so the whole batch can be redelivered; repeated failures go to the dead-letter queue
+    if failed_message_ids:
+        raise Exception('Failed to process messages: {}'.format(', '.join(failed_message_ids)))
 
     return {
         'statusCode': 200,
@@ -1,29 +1,51 @@
 # Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+import hashlib
 import os
+import re
 import aws_cdk.core as cdk
 import aws_cdk.aws_dynamodb as dynamodb
-import aws_cdk.aws_ec2 as ec2
+import aws_cdk.aws_events as events
+import aws_cdk.aws_events_targets as events_targets
 import aws_cdk.aws_glue as glue
 import aws_cdk.aws_iam as iam
 import aws_cdk.aws_lambda as _lambda
-import aws_cdk.aws_s3 as s3
-import aws_cdk.aws_s3_notifications as s3_notifications
+import aws_cdk.aws_lambda_event_sources as lambda_event_sources
+import aws_cdk.aws_logs as logs
 import aws_cdk.aws_sns as sns
+import aws_cdk.aws_sqs as sqs
+import aws_cdk.aws_ssm as ssm
 import aws_cdk.aws_stepfunctions as stepfunctions
-import aws_cdk.aws_stepfunctions_tasks as stepfunctions_tasks
 
 
 from .configuration import (
-    AVAILABILITY_ZONE_1, AVAILABILITY_ZONE_2, AVAILABILITY_ZONE_3, 
-    ROUTE_TABLE_1, ROUTE_TABLE_2, ROUTE_TABLE_3,
-    S3_RAW_BUCKET, SUBNET_ID_1, SUBNET_ID_2, SUBNET_ID_3, SHARED_SECURITY_GROUP_ID, VPC_ID,
-    get_environment_configuration, get_logical_id_prefix, get_resource_name_prefix, 
-    S3_CONFORMED_BUCKET
+    S3_CONFORMED_BUCKET_PARAMETER, S3_RAW_BUCKET_PARAMETER,
+    get_environment_configuration, get_logical_id_prefix, get_resource_name_prefix,
 )
 
 
+def l2_logical_id(*path: str) -> str:
+    """
+    Returns the logical id CDK allocates to the construct at the given path under a stack.
+    Used to keep the CloudFormation identity of resources that were moved from L2 to L1 constructs.
+
+    @param path str: The construct ids from the stack down to the resource
+    @return: str:
+    """
+    components = [component for component in path if component != 'Default']
+    path_hash = hashlib.md5('/'.join(components).encode('utf-8')).hexdigest()[:8].upper()
+    human_components = []
+    for component in components:
+        if not human_components or not human_components[-1].endswith(component):
+            human_components.append(component)
+    human = ''.join(
+        re.sub('[^A-Za-z0-9]', '', component) for component in human_components if component != 'Resource'
+    )
+
+    return human[:240] + path_hash
+
+
 class StepFunctionsStack(cdk.Stack):
     def __init__(
         self, scope: cdk.Construct, construct_id: str, target_environment: str,
@@ -49,217 +71,401 @@ class StepFunctionsStack(cdk.Stack):
         self.mappings = get_environment_configuration(target_environment)
         logical_id_prefix = get_logical_id_prefix()
         resource_name_prefix = get_resource_name_prefix()
+        # Every resource in this stack shares these prefixes, so resolve them once
+        etl_logical_id_prefix = f'{target_environment}{logical_id_prefix}Etl'
+        etl_resource_name_prefix = f'{target_environment.lower()}-{resource_name_prefix}-etl'
 
-        vpc_id = cdk.Fn.import_value(self.mappings[VPC_ID])
-        shared_security_group_output = cdk.Fn.import_value(self.mappings[SHARED_SECURITY_GROUP_ID])
-        availability_zones_output_1 = cdk.Fn.import_value(self.mappings[AVAILABILITY_ZONE_1])
-        availability_zones_output_2 = cdk.Fn.import_value(self.mappings[AVAILABILITY_ZONE_2])
-        availability_zones_output_3 = cdk.Fn.import_value(self.mappings[AVAILABILITY_ZONE_3])
-        subnet_ids_output_1 = cdk.Fn.import_value(self.mappings[SUBNET_ID_1])
-        subnet_ids_output_2 = cdk.Fn.import_value(self.mappings[SUBNET_ID_2])
-        subnet_ids_output_3 = cdk.Fn.import_value(self.mappings[SUBNET_ID_3])
-        route_tables_output_1 = cdk.Fn.import_value(self.mappings[ROUTE_TABLE_1])
-        route_tables_output_2 = cdk.Fn.import_value(self.mappings[ROUTE_TABLE_2])
-        route_tables_output_3 = cdk.Fn.import_value(self.mappings[ROUTE_TABLE_3])
-        conformed_s3_bucket_id = cdk.Fn.import_value(self.mappings[S3_CONFORMED_BUCKET])
-        # Manually construct the VPC because it lives in the target account,
-        # not the Deployment Util account where the synth is ran
-        vpc = ec2.Vpc.from_vpc_attributes(
+        # Resolved from SSM Parameter Store at deploy time so this stack does not lock the exporting stack
+        conformed_s3_bucket_id = ssm.StringParameter.value_for_string_parameter(
             self,
-            'ImportedVpc',
-            vpc_id=vpc_id,
-            availability_zones=[availability_zones_output_1, availability_zones_output_2, availability_zones_output_3],
-            private_subnet_ids=[subnet_ids_output_1, subnet_ids_output_2, subnet_ids_output_3],
-            private_subnet_route_table_ids=[route_tables_output_1, route_tables_output_2, route_tables_output_3],
+            self.mappings[S3_CONFORMED_BUCKET_PARAMETER],
         )
-        shared_security_group = ec2.SecurityGroup.from_security_group_id(
+        raw_bucket_name = ssm.StringParameter.value_for_string_parameter(
             self,
-            'ImportedSecurityGroup',
-            shared_security_group_output
+            self.mappings[S3_RAW_BUCKET_PARAMETER],
+        )
+        notification_topic = sns.Topic(self, f'{etl_logical_id_prefix}FailedTopic')
+        state_machine_name = f'{etl_resource_name_prefix}-state-machine'
+        lambda_role = self.get_lambda_role(
+            etl_logical_id_prefix,
+            etl_resource_name_prefix,
+            job_audit_table,
+            state_machine_name,
         )
-        raw_bucket_name = cdk.Fn.import_value(self.mappings[S3_RAW_BUCKET])
-        raw_bucket = s3.Bucket.from_bucket_name(self, id='ImportedRawBucket', bucket_name=raw_bucket_name)
-        notification_topic = sns.Topic(self, f'{target_environment}{logical_id_prefix}EtlFailedTopic')
 
-        status_function = _lambda.Function(
-            self,
-            f'{target_environment}{logical_id_prefix}EtlStatusUpdate',
-            function_name=f'{target_environment.lower()}-{resource_name_prefix}-etl-status-update',
-            runtime=_lambda.Runtime.PYTHON_3_8,
-            handler='lambda_handler.lambda_handler',
-            code=_lambda.Code.from_asset(f'{os.path.dirname(__file__)}/etl_job_auditor'),
-            environment={
+        status_function = self.etl_lambda_function(
+            etl_logical_id_prefix,
+            etl_resource_name_prefix,
+            'StatusUpdate',
+            'status-update-image',
+            'etl_job_auditor',
+            lambda_role,
+            {
                 'DYNAMODB_TABLE_NAME': job_audit_table.table_name,
             },
-            security_groups=[shared_security_group],
-            vpc=vpc,
-            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE),
+            # Leaves room for the DynamoDB client's retries on throttled writes
+            timeout=cdk.Duration.seconds(30),
+            # Cap parallel updates so bursts of completed jobs do not throttle the audit table
+            reserved_concurrent_executions=10,
         )
-        status_function.add_to_role_policy(
-            iam.PolicyStatement(
-                effect=iam.Effect.ALLOW,
-                actions=[
-                    'dynamodb:UpdateItem',
-                ],
-                resources=[job_audit_table.table_arn],
-            )
+
+        state_machine_log_group = logs.LogGroup(
+            self,
+            f'{etl_logical_id_prefix}StateMachineLogGroup',
+            log_group_name=f'/aws/vendedlogs/states/{state_machine_name}',
+            retention=logs.RetentionDays.ONE_MONTH,
+            removal_policy=cdk.RemovalPolicy.DESTROY,
+        )
+        state_machine_role = self.get_state_machine_role(
+            etl_logical_id_prefix,
+            [raw_to_conformed_job.name, conformed_to_purpose_built_job.name],
+            status_function,
+            notification_topic,
         )
+        # The definition is a static ASL document; only resource names and ARNs are substituted at deploy time
+        with open(f'{os.path.dirname(__file__)}/asl/etl_pipeline.asl.json') as definition_file:
+            definition_string = definition_file.read()
 
-        fail_state = stepfunctions.Fail(
+        machine = stepfunctions.CfnStateMachine(
             self,
-            f'{target_environment}{logical_id_prefix}EtlFailedState',
-            cause='Invalid response.',
-            error='Error'
+            f'{etl_logical_id_prefix}StateMachine',
+            state_machine_name=state_machine_name,
+            definition_string=definition_string,
+            definition_substitutions={
+                'Partition': self.partition,
+                'RawJobName': raw_to_conformed_job.name,
+                'ConformedJobName': conformed_to_purpose_built_job.name,
+                'StatusFunctionArn': status_function.function_arn,
+                'NotificationTopicArn': notification_topic.topic_arn,
+            },
+            role_arn=state_machine_role.role_arn,
+            # NOTE: Express Workflows cap executions at five minutes and do not support the .sync
+            # (RUN_JOB) Glue integration this pipeline relies on, so the machine stays Standard.
+            state_machine_type='STANDARD',
+            logging_configuration=stepfunctions.CfnStateMachine.LoggingConfigurationProperty(
+                destinations=[
+                    stepfunctions.CfnStateMachine.LogDestinationProperty(
+                        cloud_watch_logs_log_group=stepfunctions.CfnStateMachine.CloudWatchLogsLogGroupProperty(
+                            log_group_arn=state_machine_log_group.log_group_arn,
+                        ),
+                    ),
+                ],
+                level='ERROR',
+            ),
+        )
+        # NOTE: Keep the logical ids of the former L2 state machine and its generated role. The state machine
+        # has a fixed name, so a new logical id would make CloudFormation create a duplicate and fail.
+        machine.override_logical_id(l2_logical_id(f'{etl_logical_id_prefix}StateMachine', 'Resource'))
+        state_machine_role.node.default_child.override_logical_id(
+            l2_logical_id(f'{etl_logical_id_prefix}StateMachine', 'Role', 'Resource')
         )
-        success_state = stepfunctions.Succeed(self, f'{target_environment}{logical_id_prefix}EtlSucceededState')
 
-        failure_function_task = stepfunctions_tasks.LambdaInvoke(
+        trigger_function = self.etl_lambda_function(
+            etl_logical_id_prefix,
+            etl_resource_name_prefix,
+            'Trigger',
+            'state-machine-trigger-image',
+            'state_machine_trigger',
+            lambda_role,
+            {
+                'DYNAMODB_TABLE_NAME': job_audit_table.table_name,
+                'SFN_STATE_MACHINE_ARN': machine.attr_arn,
+                'target_bucket_name': conformed_s3_bucket_id,
+            },
+            # Allows for a full batch of ten objects, including client retries on throttling
+            timeout=cdk.Duration.minutes(2),
+        )
+        # Keep a warm pool behind an alias so S3 events do not pay for cold starts
+        trigger_alias = _lambda.Alias(
             self,
-            f'{target_environment}{logical_id_prefix}EtlFailureStatusUpdateTask',
-            lambda_function=status_function,
-            result_path='$.taskresult',
-            retry_on_service_exceptions=True,
-            output_path='$',
-            payload=stepfunctions.TaskInput.from_object({'Input.$': '$'})
+            f'{etl_logical_id_prefix}TriggerAlias',
+            alias_name='live',
+            version=trigger_function.current_version,
+            provisioned_concurrent_executions=2,
         )
-        failure_notification_task = stepfunctions_tasks.SnsPublish(
+        # Buffer raw bucket events so each invocation handles a batch of new objects
+        trigger_dead_letter_queue = sqs.Queue(
             self,
-            f'{target_environment}{logical_id_prefix}EtlFailurePublishTask',
-            topic=notification_topic,
-            subject='Job Completed',
-            message=stepfunctions.TaskInput.from_data_at('$')
+            f'{etl_logical_id_prefix}TriggerDeadLetterQueue',
+            queue_name=f'{etl_resource_name_prefix}-trigger-dlq',
+            retention_period=cdk.Duration.days(14),
         )
-        failure_function_task.next(failure_notification_task)
-        failure_notification_task.next(fail_state)
-
-        success_function_task = stepfunctions_tasks.LambdaInvoke(
+        trigger_queue = sqs.Queue(
             self,
-            f'{target_environment}{logical_id_prefix}EtlSuccessStatusUpdateTask',
-            lambda_function=status_function,
-            result_path='$.taskresult',
-            retry_on_service_exceptions=True,
-            output_path='$',
-            payload=stepfunctions.TaskInput.from_object({'Input.$': '$'})
+            f'{etl_logical_id_prefix}TriggerQueue',
+            queue_name=f'{etl_resource_name_prefix}-trigger-queue',
+            # Six times the trigger function timeout, as recommended for SQS event sources
+            visibility_timeout=cdk.Duration.minutes(12),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=5,
+                queue=trigger_dead_letter_queue,
+            ),
         )
-        success_task = stepfunctions_tasks.SnsPublish(
+        self.raw_bucket_event_bridge(etl_logical_id_prefix, etl_resource_name_prefix, raw_bucket_name)
+        events.Rule(
             self,
-            f'{target_environment}{logical_id_prefix}EtlSuccessPublishTask',
-            topic=notification_topic,
-            subject='Job Failed',
-            message=stepfunctions.TaskInput.from_data_at('$')
+            f'{etl_logical_id_prefix}RawObjectCreatedRule',
+            rule_name=f'{etl_resource_name_prefix}-raw-object-created',
+            event_pattern=events.EventPattern(
+                source=['aws.s3'],
+                detail_type=['Object Created'],
+                detail={
+                    'bucket': {
+                        'name': [raw_bucket_name],
+                    },
+                },
+            ),
+            targets=[events_targets.SqsQueue(trigger_queue)],
         )
-        success_function_task.next(success_task)
-        success_task.next(success_state)
+        trigger_alias.add_event_source(lambda_event_sources.SqsEventSource(
+            trigger_queue,
+            batch_size=10,
+            max_batching_window=cdk.Duration.seconds(5),
+        ))
 
-        glue_raw_task = stepfunctions_tasks.GlueStartJobRun(
+    def raw_bucket_event_bridge(
+        self,
+        etl_logical_id_prefix: str,
+        etl_resource_name_prefix: str,
+        raw_bucket_name: str,
+    ) -> None:
+        """
+        Turns on EventBridge notifications for the raw bucket once each deployment of this stack completes.
+
+        Earlier versions of this stack configured the raw bucket notification directly. Removing that
+        Custom::S3BucketNotifications resource rewrites the bucket's notification configuration without
+        EventBridge, and CloudFormation does so during cleanup, after every resource in the update has been
+        created. Reacting to the stack's CREATE_COMPLETE and UPDATE_COMPLETE events runs after that cleanup.
+
+        @param etl_logical_id_prefix str: The environment-specific logical id prefix for ETL resources
+        @param etl_resource_name_prefix str: The environment-specific name prefix for ETL resources
+        @param raw_bucket_name str: The name of the raw bucket
+        """
+        role = iam.Role(
             self,
-            f'{target_environment}{logical_id_prefix}GlueRawJobTask',
-            glue_job_name=raw_to_conformed_job.name,
-            arguments=stepfunctions.TaskInput.from_object({
-                # '--JOB_NAME.$': '$.JOB_NAME',
-                '--target_databasename.$': '$.target_databasename',
-                '--target_bucketname.$': '$.target_bucketname',
-                '--source_bucketname.$': '$.source_bucketname',
-                '--source_key.$': '$.source_key',
-                '--base_file_name.$': '$.base_file_name',
-                '--p_year.$': '$.p_year',
-                '--p_month.$': '$.p_month',
-                '--p_day.$': '$.p_day',
-                '--table_name.$': '$.table_name'
-            }),
-            output_path='$',
-            result_path='$.taskresult',
-            integration_pattern=stepfunctions.IntegrationPattern.RUN_JOB,
-            comment='Raw to conformed data load',
+            f'{etl_logical_id_prefix}RawBucketEventBridgeRole',
+            assumed_by=iam.ServicePrincipal('lambda.amazonaws.com'),
+            inline_policies={
+                'EtlRawBucketEventBridgePolicy': iam.PolicyDocument(statements=[
+                    iam.PolicyStatement(
+                        effect=iam.Effect.ALLOW,
+                        actions=[
+                            's3:GetBucketNotification',
+                            's3:PutBucketNotification',
+                        ],
+                        resources=[
+                            f'arn:{self.partition}:s3:::{raw_bucket_name}',
+                        ],
+                    ),
+                ]),
+            },
+            managed_policies=[
+                iam.ManagedPolicy.from_aws_managed_policy_name('service-role/AWSLambdaBasicExecutionRole'),
+            ]
         )
-        glue_raw_task.add_catch(failure_function_task, result_path='$.taskresult',)
-
-        glue_conformed_task = stepfunctions_tasks.GlueStartJobRun(
+        function = self.etl_lambda_function(
+            etl_logical_id_prefix,
+            etl_resource_name_prefix,
+            'RawBucketEventBridge',
+            'raw-bucket-event-bridge',
+            'raw_bucket_event_bridge',
+            role,
+            {
+                'RAW_BUCKET_NAME': raw_bucket_name,
+            },
+            timeout=cdk.Duration.seconds(30),
+        )
+        events.Rule(
             self,
-            f'{target_environment}{logical_id_prefix}GlueConformedJobTask',
-            glue_job_name=conformed_to_purpose_built_job.name,
-            arguments=stepfunctions.TaskInput.from_object({
-                '--table_name.$': '$.table_name',
-                '--source_bucketname.$': '$.source_bucketname',
-                '--base_file_name.$': '$.base_file_name',
-                '--p_year.$': '$.p_year',
-                '--p_month.$': '$.p_month',
-                '--p_day.$': '$.p_day'
-            }),
-            output_path='$',
-            result_path='$.taskresult',
-            integration_pattern=stepfunctions.IntegrationPattern.RUN_JOB,
-            comment='Conformed to purpose-built data load',
+            f'{etl_logical_id_prefix}StackCompleteRule',
+            rule_name=f'{etl_resource_name_prefix}-stack-complete',
+            event_pattern=events.EventPattern(
+                source=['aws.cloudformation'],
+                detail_type=['CloudFormation Stack Status Change'],
+                resources=[self.stack_id],
+                detail={
+                    'status-details': {
+                        'status': ['CREATE_COMPLETE', 'UPDATE_COMPLETE'],
+                    },
+                },
+            ),
+            targets=[events_targets.LambdaFunction(function)],
         )
-        glue_conformed_task.add_catch(failure_function_task, result_path='$.taskresult',)
 
-        machine_definition = glue_raw_task.next(
-            glue_conformed_task.next(success_function_task)
-        )
+    def etl_lambda_function(
+        self,
+        etl_logical_id_prefix: str,
+        etl_resource_name_prefix: str,
+        logical_id_suffix: str,
+        resource_name_suffix: str,
+        asset_directory: str,
+        role: iam.IRole,
+        environment: dict,
+        timeout: cdk.Duration = None,
+        reserved_concurrent_executions: int = None,
+    ) -> _lambda.DockerImageFunction:
+        """
+        Creates a container image Lambda Function from a handler directory in this package
+
+        @param etl_logical_id_prefix str: The environment-specific logical id prefix for ETL resources
+        @param etl_resource_name_prefix str: The environment-specific name prefix for ETL resources
+        @param logical_id_suffix str: The suffix that identifies this function in its logical id
+        @param resource_name_suffix str: The suffix that identifies this function in its name
+        @param asset_directory str: The directory, relative to this file, that contains the Dockerfile
+        @param role iam.IRole: The execution role for the function
+        @param environment dict: The environment variables to set on the function
+        @param timeout cdk.Duration: The function timeout, if not the Lambda default
+        @param reserved_concurrent_executions int: The concurrency limit for the function, if any
 
-        machine = stepfunctions.StateMachine(
+        @returns _lambda.DockerImageFunction: The function that was created
+        """
+        # NOTE: Changing the package type from Zip to Image replaces the function, so image functions
+        # need names that differ from the zip functions they replace or the stack update fails.
+        function = _lambda.DockerImageFunction(
             self,
-            f'{target_environment}{logical_id_prefix}EtlStateMachine',
-            state_machine_name=f'{target_environment.lower()}-{resource_name_prefix}-etl-state-machine',
-            definition=machine_definition,
+            f'{etl_logical_id_prefix}{logical_id_suffix}',
+            function_name=f'{etl_resource_name_prefix}-{resource_name_suffix}',
+            code=_lambda.DockerImageCode.from_image_asset(f'{os.path.dirname(__file__)}/{asset_directory}'),
+            role=role,
+            environment=environment,
+            timeout=timeout,
+            reserved_concurrent_executions=reserved_concurrent_executions,
         )
+        # NOTE: The architecture property is not available in this CDK version, so override it directly.
+        # The images are built from the arm64 Lambda base image to run on Graviton2.
+        function.node.default_child.add_property_override('Architectures', ['arm64'])
+
+        return function
 
-        trigger_function = _lambda.Function(
+    def get_lambda_role(
+        self,
+        etl_logical_id_prefix: str,
+        etl_resource_name_prefix: str,
+        job_audit_table: dynamodb.Table,
+        state_machine_name: str,
+    ) -> iam.Role:
+        """
+        Creates the execution role shared by the ETL Lambda Functions
+
+        @param etl_logical_id_prefix str: The environment-specific logical id prefix for ETL resources
+        @param etl_resource_name_prefix str: The environment-specific name prefix for ETL resources
+        @param job_audit_table dynamodb.Table: The DynamoDB Table for storing Job Audit results
+        @param state_machine_name str: The name of the ETL State Machine the trigger function starts
+
+        @returns iam.Role: The role that was created
+        """
+        return iam.Role(
             self,
-            f'{target_environment}{logical_id_prefix}EtlTrigger',
-            function_name=f'{target_environment.lower()}-{resource_name_prefix}-etl-state-machine-trigger',
-            runtime=_lambda.Runtime.PYTHON_3_8,
-            handler='lambda_handler.lambda_handler',
-            code=_lambda.Code.from_asset(f'{os.path.dirname(__file__)}/state_machine_trigger'),
-            environment={
-                'DYNAMODB_TABLE_NAME': job_audit_table.table_name,
-                'SFN_STATE_MACHINE_ARN': machine.state_machine_arn,
-                'target_bucket_name': conformed_s3_bucket_id,
+            f'{etl_logical_id_prefix}LambdaRole',
+            role_name=f'{etl_resource_name_prefix}-lambda-role',
+            assumed_by=iam.ServicePrincipal('lambda.amazonaws.com'),
+            inline_policies={
+                'EtlLambdaPolicy': iam.PolicyDocument(statements=[
+                    iam.PolicyStatement(
+                        effect=iam.Effect.ALLOW,
+                        actions=[
+                            'dynamodb:PutItem',
+                            'dynamodb:UpdateItem',
+                        ],
+                        resources=[
+                            job_audit_table.table_arn,
+                        ],
+                    ),
+                    # NOTE: The ARN is built from the name because the state machine depends on the
+                    # status function, which would otherwise make this role depend on the state machine.
+                    iam.PolicyStatement(
+                        effect=iam.Effect.ALLOW,
+                        actions=[
+                            'states:StartExecution',
+                        ],
+                        resources=[
+                            self.format_arn(
+                                service='states',
+                                resource='stateMachine',
+                                resource_name=state_machine_name,
+                                sep=':',
+                            ),
+                        ],
+                    ),
+                ]),
             },
-            security_groups=[shared_security_group],
-            vpc=vpc,
-            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE),
-        )
-        trigger_function.add_to_role_policy(
-            iam.PolicyStatement(
-                effect=iam.Effect.ALLOW,
-                actions=[
-                    'dynamodb:PutItem',
-                    'dynamodb:DescribeTable',
-                    'dynamodb:GetItem',
-                    'dynamodb:Scan',
-                    'dynamodb:Query',
-                    'dynamodb:UpdateItem',
-                    'dynamodb:DescribeTimeToLive',
-                    'dynamodb:GetRecords',
-                ],
-                resources=['*'],
-            )
-        )
-        trigger_function.add_to_role_policy(
-            iam.PolicyStatement(
-                effect=iam.Effect.ALLOW,
-                actions=['dynamodb:ListTables'],
-                resources=['*'],
-            )
+            managed_policies=[
+                iam.ManagedPolicy.from_aws_managed_policy_name('service-role/AWSLambdaBasicExecutionRole'),
+            ]
         )
-        trigger_function.add_to_role_policy(
-            iam.PolicyStatement(
-                effect=iam.Effect.ALLOW,
-                actions=[
-                    'states:StartExecution',
-                ],
-                resources=[machine.state_machine_arn],
-            )
-        )
-        # NOTE: Preferred method is not compatible. See: https://github.com/aws/aws-cdk/issues/4323
-        # trigger_function.add_event_source(lambda_event_sources.S3EventSource(
-        #     bucket=raw_bucket,
-        #     events=[
-        #         s3.EventType.OBJECT_CREATED,
-        #     ]
-        # ))
-        raw_bucket.add_event_notification(
-            s3.EventType.OBJECT_CREATED,
-            s3_notifications.LambdaDestination(trigger_function),
+
+    def get_state_machine_role(
+        self,
+        etl_logical_id_prefix: str,
+        glue_job_names: list,
+        status_function: _lambda.IFunction,
+        notification_topic: sns.ITopic,
+    ) -> iam.Role:
+        """
+        Creates the role used during ETL State Machine execution
+
+        @param etl_logical_id_prefix str: The environment-specific logical id prefix for ETL resources
+        @param glue_job_names list: The names of the Glue Jobs the state machine runs
+        @param status_function _lambda.IFunction: The Lambda Function that updates the job audit status
+        @param notification_topic sns.ITopic: The SNS Topic that job notifications are published to
+
+        @returns iam.Role: The role that was created
+        """
+        return iam.Role(
+            self,
+            f'{etl_logical_id_prefix}StateMachineRole',
+            assumed_by=iam.ServicePrincipal('states.amazonaws.com'),
+            inline_policies={
+                'EtlStateMachinePolicy': iam.PolicyDocument(statements=[
+                    iam.PolicyStatement(
+                        effect=iam.Effect.ALLOW,
+                        actions=[
+                            'glue:StartJobRun',
+                            'glue:GetJobRun',
+                            'glue:GetJobRuns',
+                            'glue:BatchStopJobRun',
+                        ],
+                        resources=[
+                            self.format_arn(service='glue', resource='job', resource_name=job_name)
+                            for job_name in glue_job_names
+                        ],
+                    ),
+                    iam.PolicyStatement(
+                        effect=iam.Effect.ALLOW,
+                        actions=[
+                            'lambda:InvokeFunction',
+                        ],
+                        resources=[
+                            status_function.function_arn,
+                            f'{status_function.function_arn}:*',
+                        ],
+                    ),
+                    iam.PolicyStatement(
+                        effect=iam.Effect.ALLOW,
+                        actions=[
+                            'sns:Publish',
+                        ],
+                        resources=[
+                            notification_topic.topic_arn,
+                        ],
+                    ),
+                    # NOTE: Log delivery actions do not support resource-level permissions
+                    iam.PolicyStatement(
+                        effect=iam.Effect.ALLOW,
+                        actions=[
+                            'logs:CreateLogDelivery',
+                            'logs:GetLogDelivery',
+                            'logs:UpdateLogDelivery',
+                            'logs:DeleteLogDelivery',
+                            'logs:ListLogDeliveries',
+                            'logs:PutResourcePolicy',
+                            'logs:DescribeResourcePolicies',
+                            'logs:DescribeLogGroups',
+                        ],
+                        resources=[
+                            '*',
+                        ],
+                    ),
+                ]),
+            },
         )